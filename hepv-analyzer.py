@@ -25,16 +25,38 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
 import pathlib
+import re
 import sys
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Dict, Tuple
+from functools import cached_property, lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
 import matplotlib.pyplot as plt
 from numpy.typing import NDArray
+from PIL import Image
+
+# Compiled kernels are cached next to the script and reused across runs. A
+# cache entry records the name the script was loaded under (__main__ for the
+# CLI) and fails to load under any other, so each name gets its own subdir.
+os.environ.setdefault(
+    "NUMBA_CACHE_DIR",
+    str(pathlib.Path(__file__).resolve().parent / ".numba_cache" / re.sub(r"\W", "_", __name__))
+)
+try:  # optional: JIT-compiles the simulation kernels (~50x faster)
+    import numba as nb
+    from numba import njit, prange
+except ImportError:  # pure-Python fallback, identical results
+    nb = None
+    prange = range
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
 
 __version__: str = "3.1.0-beta"
 __author__:  str = "Yusuf Cemal Isbuga"
@@ -66,6 +88,8 @@ def parse_cli() -> argparse.Namespace:
     p.add_argument("--save-individual", action="store_true", help="save each figure")
     p.add_argument("--skip-combined", action="store_true", help="no combined panel")
     p.add_argument("--dpi", type=int, default=300, help="figure DPI")
+    p.add_argument("--combined-dpi", type=int, default=150, help="combined panel DPI")
+    p.add_argument("--fast-plots", action="store_true", help="quick 100 DPI JPEG plots")
     p.add_argument("--no-validation", action="store_true", help="skip validation")
     p.add_argument("--verbose", action="store_true", help="debug logging")
     p.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
@@ -98,12 +122,14 @@ VAL = ValidationDB()
 def print_validation_report() -> None:
     if not logging.root.isEnabledFor(logging.INFO): return
     bar = "=" * 72
-    print(f"\n{bar}\nMODEL VALIDATION REFERENCES\n{bar}")
-    print(f"\nElectric motor (Tesla M3): {VAL.TESLA_M3['peak_efficiency']*100:.2f}% @ {VAL.TESLA_M3['peak_rpm']} RPM")
     lo, hi = VAL.INDUSTRIAL_PNEUMATIC['efficiency_range']
-    print(f"Pneumatic motor: {lo*100:.0f}–{hi*100:.0f}% (optimal 6-8 bar)")
-    print(f"Peugeot trials: {VAL.PEUGEOT_TRIALS['actual_saving']*100:.0f}% actual vs {VAL.PEUGEOT_TRIALS['claimed_saving']*100:.0f}% claimed")
-    print(bar)
+    print("\n".join((
+        f"\n{bar}\nMODEL VALIDATION REFERENCES\n{bar}",
+        f"\nElectric motor (Tesla M3): {VAL.TESLA_M3['peak_efficiency']*100:.2f}% @ {VAL.TESLA_M3['peak_rpm']} RPM",
+        f"Pneumatic motor: {lo*100:.0f}–{hi*100:.0f}% (optimal 6-8 bar)",
+        f"Peugeot trials: {VAL.PEUGEOT_TRIALS['actual_saving']*100:.0f}% actual vs {VAL.PEUGEOT_TRIALS['claimed_saving']*100:.0f}% claimed",
+        bar,
+    )))
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 2.  PARAMETERS
@@ -136,71 +162,194 @@ class Params:
     pneu_pressure_min: float = 100;  pneu_power_split: float = 0.35
     regen_split_batt: float = 0.75;  regen_split_tank: float = 0.25
     regen_tank_Pmax: float = 250
+    # Derived (set in __post_init__)
+    rpm_per_kmh: float = field(init=False)
+    x_per_kmh: float = field(init=False)  # (rpm / motor_rpm_base) per km/h
+    k_comp: float = field(init=False)     # polytropic T-P exponents (n - 1) / n
+    k_exp: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        rpm_per_kmh = 60.0 * self.gear / (math.pi * self.wheel_diam * 3.6)
+        object.__setattr__(self, "rpm_per_kmh", rpm_per_kmh)
+        object.__setattr__(self, "x_per_kmh", rpm_per_kmh / self.motor_rpm_base)
+        object.__setattr__(self, "k_comp", (self.n_comp - 1) / self.n_comp)
+        object.__setattr__(self, "k_exp", (self.n_exp - 1) / self.n_exp)
 
 P = Params()
 
+# Numba cannot type a dataclass: kernels receive the same fields as a record.
+# The pure-Python fallback takes the dataclasses themselves, whose slot reads
+# are far cheaper than np.record field access.
+PARAMS_DTYPE = np.dtype([(f.name, np.float64) for f in fields(Params)], align=True)
+
+def kernel_params_array(params: Sequence[Params]) -> np.recarray | List[Params]:
+    """Record array of `params` (the list itself without Numba)."""
+    if nb is None:
+        return list(params)
+    rows = [tuple(getattr(p, f.name) for f in fields(p)) for p in params]
+    return np.rec.array(rows, dtype=PARAMS_DTYPE)
+
+_kernel_params_last: List = [None, None]  # (Params, view) of the previous call
+
+def kernel_params(p: Optional[Params] = None) -> np.record | Params:
+    """
+    Kernel view of `p`, by default of the current module-level P (read per
+    call). Params is frozen, so the view is rebuilt only for a new object.
+    """
+    p = P if p is None else p
+    if p is not _kernel_params_last[0]:
+        _kernel_params_last[:] = p, kernel_params_array([p])[0]
+    return _kernel_params_last[1]
+
+# Explicit kernel signatures: Numba compiles (or loads from its disk cache)
+# at import time instead of on the first simulation call.
+if nb is not None:
+    f8, i8, b1, rec = nb.float64, nb.int64, nb.boolean, nb.from_dtype(PARAMS_DTYPE)
+    f8a, f8c = nb.float64[:], nb.float64[::1]
+    f4c2 = nb.float32[:, ::1]
+else:
+    f8 = i8 = b1 = rec = f8a = f8c = f4c2 = None
+
+def _sig(ret, *args):
+    """Numba signature ``ret(*args)``; a tuple ``ret`` is a tuple return."""
+    if nb is None:
+        return None
+    return (nb.types.Tuple(ret) if isinstance(ret, tuple) else ret)(*args)
+
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 3.  PHYSICS MODELS
 # ╚═══════════════════════════════════════════════════════════════════════════╝
 
-def aero_drag(v: float) -> float:
-    return 0.5 * P.rho * P.Cd * P.A * v**2
+# Road-load model, one definition for both vehicles. Each generic kernel lists
+# the scalar and whole-cycle array forms it is called with, so both are
+# compiled (or loaded) at import like the simulation kernels.
+@njit([_sig(f8, f8, rec), _sig(f8c, f8a, rec)], cache=True)
+def _aero_drag(v, p):
+    return 0.5 * p.rho * p.Cd * p.A * v**2
+
+@njit([_sig(f8, f8, rec)], cache=True)
+def _rolling_resistance(m, p):
+    return p.Crr * m * p.g
+
+@njit([_sig(f8, f8, f8, f8, rec), _sig(f8c, f8a, f8a, f8, rec)], cache=True)
+def _power_required(v, a, m, p):
+    F = m * a + _aero_drag(v, p) + _rolling_resistance(m, p)
+    return F * np.maximum(v, 1e-3)
+
+@njit(_sig(f8c, f8a, f8a, f8, rec), cache=True)
+def _wheel_power(v: NDArray, acc: NDArray, m: float, p: np.record) -> NDArray:
+    """Whole-cycle wheel power [W] (the simulators' entry point)."""
+    return _power_required(v, acc, m, p)
+
+def aero_drag(v):
+    return _aero_drag(v, kernel_params())
+
+def rolling_resistance(m):
+    return _rolling_resistance(m, kernel_params())
 
-def rolling_resistance(m: float) -> float:
-    return P.Crr * m * P.g
+def power_required(v, a, m):
+    """Wheel power [W]; accepts scalars or whole-cycle arrays."""
+    return _power_required(v, a, m, kernel_params())
 
-def power_required(v: float, a: float, m: float) -> float:
-    F = m * a + aero_drag(v) + rolling_resistance(m)
-    return F * max(v, 1e-3)
+def speed_to_rpm(kmh):
+    return kmh * P.rpm_per_kmh
 
-def speed_to_rpm(kmh: float) -> float:
-    v_ms = kmh / 3.6
-    wheel_rps = v_ms / (math.pi * P.wheel_diam)
-    return wheel_rps * 60.0 * P.gear
+def acceleration(v: NDArray, dt: float) -> NDArray:
+    """Backward-difference acceleration [m/s²] (a[0] = 0)."""
+    return np.concatenate(([0.0], np.diff(v))) / dt
 
 # ---------------------------------------------------------------------------#
 # EFFICIENCY MAPS (FIXED)
 # ---------------------------------------------------------------------------#
-def electric_eff(kmh: float, load: float) -> float:
-    """Electric motor efficiency (0–1)."""
-    x = speed_to_rpm(kmh) / P.motor_rpm_base
-    # Speed factor
-    if   x < 0.2:  s = 0.75
-    elif x < 0.5:  s = 0.75 + 0.15 * (x - 0.2) / 0.3
-    elif x <= 1.5: s = 0.90 + 0.02 * (1 - abs(x - 1))
-    else:          s = 0.90 - 0.10 * (x - 1.5)
-    # Load factor
-    if   load < 0.1: l = 0.60 + 4 * load
-    elif load < 0.8: l = 1.0
-    else:            l = 1.0 - 0.05 * (load - 0.8) / 0.2
-    return np.clip(s * l, 0.70, P.motor_eta_peak)
-
-def pneumatic_eff(kmh: float, bar: float) -> float:
+# Piecewise-linear maps as knot tables, evaluated branch-free by np.interp
+# (a repeated knot encodes a step). Past the last knot the end value is held,
+# which the final clip already saturates.
+_ELEC_X      = np.array([0.0, 0.2, 0.5, 0.5, 1.0, 1.5, 1.5, 3.5])   # rpm / rpm_base
+_ELEC_SPEED  = np.array([0.75, 0.75, 0.90, 0.91, 0.92, 0.91, 0.90, 0.70])
+_ELEC_LOAD_X = np.array([0.0, 0.1, 0.8, 4.8])                        # P / Pmax
+_ELEC_LOAD   = np.array([0.60, 1.00, 1.00, 0.00])
+_PNEU_BAR_X  = np.array([0.0, 6.0, 50.0, 150.0, 250.0, 350.0])       # bar
+_PNEU_BAR    = np.array([0.15, 0.45, 0.80, 0.80, 0.60, 0.00])
+_PNEU_KMH_X  = np.array([20.0, 40.0, 60.0, 80.0])                   # km/h
+_PNEU_KMH    = np.array([1.00, 0.85, 0.60, 0.40])
+
+# One definition per map, shared by the HEPV kernel (scalars), simulate_bev and
+# the plots (arrays); signatures pinned like the road-load model.
+@njit([_sig(f8, f8, f8, rec), _sig(f8c, f8a, f8a, rec), _sig(f8c, f8a, f8, rec)], cache=True)
+def _electric_eff(kmh, load, p):
+    s = np.interp(kmh * p.x_per_kmh, _ELEC_X, _ELEC_SPEED)  # speed factor
+    l = np.interp(load, _ELEC_LOAD_X, _ELEC_LOAD)          # load factor
+    return np.minimum(np.maximum(s * l, 0.70), p.motor_eta_peak)
+
+def electric_eff(kmh, load):
+    """Electric motor efficiency (0–1); accepts scalars or arrays."""
+    return _electric_eff(kmh, load, kernel_params())
+
+@njit([_sig(f8, f8, f8, rec), _sig(f8c, f8a, f8a, rec), _sig(f8c, f8, f8a, rec)], cache=True)
+def _pneumatic_eff(kmh, bar, p):
+    pf = np.interp(bar, _PNEU_BAR_X, _PNEU_BAR)  # pressure effect (optimum 50-150 bar)
+    s = np.interp(kmh, _PNEU_KMH_X, _PNEU_KMH)   # speed effect
+    return np.minimum(np.maximum(p.pneu_eta_peak * pf * s, 0.10), 0.40)
+
+def pneumatic_eff(kmh, bar):
     """
-    Pneumatic motor efficiency (0–1).
+    Pneumatic motor efficiency (0–1); accepts scalars or arrays.
     FIXED: Realistic pressure curve with optimal range at 6-8 bar.
     """
-    # Pressure effect (realistic industrial data)
-    if   bar <   6:  p = 0.15 + 0.30 * (bar / 6)          # 15-45% below optimal
-    elif bar <  50:  p = 0.45 + 0.35 * ((bar - 6) / 44)   # 45-80% rising
-    elif bar < 150:  p = 0.80                              # 80% plateau
-    elif bar < 250:  p = 0.80 - 0.20 * ((bar - 150) / 100) # 80-60% degrading
-    else:            p = 0.60 - 0.30 * ((bar - 250) / 50)  # 60-30% high pressure
-    
-    # Speed effect
-    if   kmh < 20:  s = 1.0
-    elif kmh < 40:  s = 1.0 - 0.15 * (kmh - 20) / 20
-    elif kmh < 60:  s = 0.85 - 0.25 * (kmh - 40) / 20
-    else:           s = max(0.60 - 0.20 * (kmh - 60) / 20, 0.40)
-    
-    return np.clip(P.pneu_eta_peak * p * s, 0.10, 0.40)
+    return _pneumatic_eff(kmh, bar, kernel_params())
 
 # ---------------------------------------------------------------------------#
 # TANK THERMODYNAMICS (COMPLETELY REWRITTEN - MASS-BASED)
 # ---------------------------------------------------------------------------#
+@njit(_sig(f8, f8, f8, rec), cache=True)
+def _initial_tank_mass(Pa: float, T: float, p: np.record) -> float:
+    return (Pa * p.Vtank) / (p.R * T)
+
+@njit(_sig((f8, f8, f8), f8, f8, f8, f8, b1, rec), cache=True, inline="always")
+def _tank_state_update(
+    m_air: float, T: float, E_flow: float, dt: float, charging: bool, p: np.record
+) -> Tuple[float, float, float]:
+    if abs(E_flow) < 1e-6:
+        # No flow: only leakage & cooling
+        m_new = m_air * (1.0 - p.leak_per_min / 60.0 * dt)
+        T_new = T + (p.Tamb - T) * p.heat_coef * dt
+        P_new = (m_new * p.R * T_new) / p.Vtank
+        return m_new, T_new, P_new
+    
+    # Energy transfer; `charging` indexes the mode-dependent constants
+    E_total = E_flow * dt  # [J]
+    c = int(charging)
+    
+    # Compression adds ambient air, expansion removes tank air
+    # (mass flow = energy / specific enthalpy)
+    dm = (-1.0, 1.0)[c] * E_total / (p.Cp * (T, p.Tamb)[c])
+    m_new = max(1e-6, m_air + dm)
+    k_poly = (p.k_exp, p.k_comp)[c]  # (n - 1) / n
+    
+    # Polytropic temperature change (rise on compression, drop on expansion).
+    # At fixed V and T the pressure ratio P_int/P_old is the mass ratio, so
+    # (m_new/m_air)**k as exp(k·log1p(Δm/m_air)): accurate for small Δm
+    if m_air > 0:
+        T_new = T * math.exp(k_poly * math.log1p((m_new - m_air) / m_air))
+    else:
+        T_new = T
+    
+    # Heat exchange with environment
+    T_new += (p.Tamb - T_new) * p.heat_coef * dt
+    T_new = min(max(T_new, 250.0), 400.0)
+    
+    # Leakage
+    m_new *= (1.0 - p.leak_per_min / 60.0 * dt)
+    
+    # Final pressure (ideal gas)
+    P_new = (m_new * p.R * T_new) / p.Vtank
+    P_new = min(max(P_new, p.Pamb), p.Pmax)
+    
+    return m_new, T_new, P_new
+
 def initial_tank_mass(Pa: float, T: float) -> float:
     """Initial air mass in tank [kg]."""
-    return (Pa * P.Vtank) / (P.R * T)
+    return _initial_tank_mass(Pa, T, kernel_params())
 
 def tank_state_update(
     m_air: float, T: float, E_flow: float, dt: float, charging: bool
@@ -218,316 +367,429 @@ def tank_state_update(
     Returns:
         (new_mass, new_temp, new_pressure)
     """
-    if abs(E_flow) < 1e-6:
-        # No flow: only leakage & cooling
-        m_new = m_air * (1.0 - P.leak_per_min / 60.0 * dt)
-        T_new = T + (P.Tamb - T) * P.heat_coef * dt
-        P_new = (m_new * P.R * T_new) / P.Vtank
-        return m_new, T_new, P_new
-    
-    # Energy transfer
-    E_total = E_flow * dt  # [J]
-    
-    if charging:
-        # Compression: add mass + heat
-        # Simplified: assume isothermal compression then adiabatic heating
-        dm = E_total / (P.Cp * P.Tamb)  # Mass flow (energy/specific enthalpy)
-        m_new = m_air + dm
-        
-        # Temperature rise from compression work
-        P_old = (m_air * P.R * T) / P.Vtank if m_air > 0 else P.Pamb
-        P_intermediate = (m_new * P.R * T) / P.Vtank
-        
-        # Polytropic temperature change
-        if P_old > 0:
-            T_new = T * (P_intermediate / P_old) ** ((P.n_comp - 1) / P.n_comp)
-        else:
-            T_new = T
-    else:
-        # Expansion: remove mass + cool
-        dm = E_total / (P.Cp * T)  # Mass consumed
-        m_new = max(1e-6, m_air - dm)
-        
-        # Temperature drop from expansion
-        P_old = (m_air * P.R * T) / P.Vtank
-        P_intermediate = (m_new * P.R * T) / P.Vtank
-        
-        if P_old > 0:
-            T_new = T * (P_intermediate / P_old) ** ((P.n_exp - 1) / P.n_exp)
-        else:
-            T_new = T
-    
-    # Heat exchange with environment
-    T_new += (P.Tamb - T_new) * P.heat_coef * dt
-    T_new = np.clip(T_new, 250.0, 400.0)
-    
-    # Leakage
-    m_new *= (1.0 - P.leak_per_min / 60.0 * dt)
-    
-    # Final pressure (ideal gas)
-    P_new = (m_new * P.R * T_new) / P.Vtank
-    P_new = np.clip(P_new, P.Pamb, P.Pmax)
-    
-    return m_new, T_new, P_new
+    return _tank_state_update(m_air, T, E_flow, dt, charging, kernel_params())
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 4.  DRIVING CYCLE
 # ╚═══════════════════════════════════════════════════════════════════════════╝
 def urban_cycle(duration: float, dt: float) -> Tuple[NDArray, NDArray]:
+    """
+    (t, v) for the repeated urban pattern. Built once per (duration, dt);
+    every call returns its own copies, so callers may modify them.
+    """
+    t, v = _urban_cycle(duration, dt)
+    return t.copy(), v.copy()
+
+@lru_cache(maxsize=16)
+def _urban_cycle(duration: float, dt: float) -> Tuple[NDArray, NDArray]:
     t = np.arange(0.0, duration, dt)
-    v = np.zeros_like(t)
-    pattern = [
+    pattern = np.array([
         (0, 8, 0, 30/3.6), (8, 18, 30/3.6, 30/3.6), (18, 23, 30/3.6, 0),
         (23, 33, 0, 0), (33, 43, 0, 50/3.6), (43, 63, 50/3.6, 50/3.6),
         (63, 70, 50/3.6, 0), (70, 80, 0, 0)
-    ]
+    ])
     period = 80
-    for r in range(int(duration // period) + 1):
-        off = r * period
-        for ts, te, vs, ve in pattern:
-            i0 = int((off + ts) / dt);  i1 = int(min((off + te) / dt, len(t)))
-            if i0 >= len(t): break
-            v[i0:i1] = np.linspace(vs, ve, i1 - i0)
+    # Segment endpoints for every repeat, as sample indices
+    off = period * np.arange(int(duration // period) + 1)[:, None]
+    i0 = ((off + pattern[:, 0]) / dt).astype(int).ravel()
+    i1 = np.minimum((off + pattern[:, 1]) / dt, len(t)).astype(int).ravel()
+    vs = np.tile(pattern[:, 2], len(off));  ve = np.tile(pattern[:, 3], len(off))
+    keep = (i0 < len(t)) & (i1 > i0)
+    i0, i1, vs, ve = i0[keep], i1[keep], vs[keep], ve[keep]
+    ve = np.where(i1 - i0 > 1, ve, vs)  # single-sample segment holds vs
+    # Each segment ramps vs → ve over samples i0 … i1-1 (one np.interp pass)
+    knots = np.column_stack((i0, i1 - 1)).ravel()
+    v = np.interp(np.arange(len(t)), knots, np.column_stack((vs, ve)).ravel())
     return t, v
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 5.  SIMULATORS (FIXED)
 # ╚═══════════════════════════════════════════════════════════════════════════╝
-def simulate_bev(t: NDArray, v: NDArray) -> Dict:
-    dt, n = t[1] - t[0], len(t)
-    soc = np.ones(n);  eff = np.zeros(n);  power = np.zeros(n)
-    batt = P.batt_kWh * 3.6e6
-
-    for k in range(1, n):
-        a = (v[k] - v[k-1]) / dt
-        Pw = np.clip(power_required(v[k], a, P.m0), -12_000, P.motor_Pmax)
-        power[k], kmh = Pw, v[k] * 3.6
-
-        if Pw >= 0:  # Traction
-            η = electric_eff(kmh, Pw / P.motor_Pmax)
-            batt -= Pw / η * dt
-            eff[k] = η
-        else:  # Regen
-            ηr = electric_eff(kmh, 0.2) * P.inverter_eta
-            max_regen = (P.batt_kWh * 3.6e6 * P.regen_limit - batt) / dt
-            Pb = min(-Pw * ηr, max_regen)
-            batt += Pb * dt
-            eff[k] = ηr
-
-        soc[k] = np.clip(batt / (P.batt_kWh * 3.6e6), 0, 1)
-
-    return dict(soc=soc, eff=eff, power=power, E_kWh=(P.batt_kWh * 3.6e6 - batt) / 3.6e6)
+# Simulator results. The per-step traces are None when trace=False.
+class BevResult(NamedTuple):
+    E_kWh: float
+    soc: Optional[NDArray] = None
+    eff: Optional[NDArray] = None
+    power: Optional[NDArray] = None
+
+class HepvResult(NamedTuple):
+    E_kWh: float
+    pneu_use: int
+    soc: Optional[NDArray] = None
+    Pe: Optional[NDArray] = None
+    Pp: Optional[NDArray] = None
+    tankP_bar: Optional[NDArray] = None
+    tankT_C: Optional[NDArray] = None
+    tankM_kg: Optional[NDArray] = None
+
+def simulate_bev(t: NDArray, v: NDArray, trace: bool = True) -> BevResult:
+    """
+    Whole-cycle NumPy evaluation. Only the regen cap depends on the battery
+    state, and b[k] = min(b[k-1] + Δ[k], cap) unrolls to the cumulative sum S
+    plus the running minimum of (cap - S) over the braking steps.
 
-def simulate_hepv(t: NDArray, v: NDArray) -> Dict:
-    """FIXED: No double efficiency penalty, mass-based tank."""
-    dt, n, m = t[1] - t[0], len(t), P.m0 + P.m_pneu
-    
-    soc = np.ones(n);  Pe = np.zeros(n);  Pp = np.zeros(n)
-    tankP = np.empty(n);  tankT = np.empty(n);  tankM = np.empty(n)
+    With trace=False only E_kWh is returned (no soc/eff/power traces).
+    """
+    v = np.ascontiguousarray(v, dtype=np.float64)
+    dt, kmh, pk = t[1] - t[0], v * 3.6, kernel_params()
+    batt0 = P.batt_kWh * 3.6e6
+    cap = batt0 * P.regen_limit
+
+    Pwheel = _wheel_power(v, acceleration(v, dt), P.m0, pk)
+    power = np.clip(Pwheel, -12_000, P.motor_Pmax)
+    power[0] = 0.0
+    regen = power < 0
+
+    η = _electric_eff(kmh, power / P.motor_Pmax, pk)   # traction
+    ηr = _electric_eff(kmh, 0.2, pk) * P.inverter_eta  # regen
+    delta = np.where(regen, -power * ηr * dt, -power / η * dt)
+    delta[0] = 0.0
+
+    S = batt0 + np.cumsum(delta)
+    batt = S + np.minimum.accumulate(np.where(regen, cap - S, 0.0))
+    E_kWh = (batt0 - batt[-1]) / 3.6e6
+    if not trace:
+        return BevResult(E_kWh)
+
+    eff = np.where(regen, ηr, η);  eff[0] = 0.0
+    soc = np.clip(batt / batt0, 0, 1)
+    # Traces are stored as float32; the energy integration above stays float64
+    return BevResult(E_kWh, soc.astype(np.float32), eff.astype(np.float32),
+                     power.astype(np.float32))
+
+# Rows of the HEPV kernel's float32 output buffer (one contiguous trace per
+# channel). The battery and tank state is integrated in float64 locals and
+# only rounded when a sample is stored. Without trace the buffer has a single
+# column that every step overwrites.
+HEPV_COLS = ("batt_J", "Pe", "Pp", "tankP_Pa", "tankT_K", "tankM_kg")
+
+@njit(_sig((f4c2, f8, i8), f8a, f8a, f8, rec, b1), cache=True, fastmath=True)
+def _simulate_hepv_kernel(
+    v: NDArray, Pwheel: NDArray, dt: float, p: np.record, trace: bool
+) -> Tuple:
+    n = len(v)
+    # Hoisted parameter loads (plain locals inside the time loop)
+    batt_full = p.batt_kWh * 3.6e6;  batt_cap = batt_full * p.regen_limit
+    batt_pneu_min, batt_regen_min = 0.2 * batt_full, 0.3 * batt_full  # SoC 20% / 30%
+    motor_Pmax, inverter_eta, comp_eta = p.motor_Pmax, p.inverter_eta, p.comp_eta
+    speed_thr, pressure_min, power_thr = p.pneu_speed_thr, p.pneu_pressure_min, p.pneu_power_thr
+    split_pneu, split_batt, split_tank = p.pneu_power_split, p.regen_split_batt, p.regen_split_tank
+    regen_tank_Pmax = p.regen_tank_Pmax
     
-    tankP[0] = P.P_init
-    tankT[0] = P.Tamb
-    tankM[0] = initial_tank_mass(P.P_init, P.Tamb)
+    out = np.empty((len(HEPV_COLS), n if trace else 1), np.float32)
+    stride = int(trace)
+    batt_tr, Pe_tr, Pp_tr, tankP, tankT, tankM = out[0], out[1], out[2], out[3], out[4], out[5]
     
-    batt = P.batt_kWh * 3.6e6
+    batt = batt_full
+    Pa, T = p.P_init, p.Tamb
+    m_air = _initial_tank_mass(Pa, T, p)
     pneu_use = 0
 
+    batt_tr[0] = batt;  Pe_tr[0] = 0.0;  Pp_tr[0] = 0.0
+    tankP[0], tankT[0], tankM[0] = Pa, T, m_air
+
     for k in range(1, n):
-        a = (v[k] - v[k-1]) / dt
-        Pw = power_required(v[k], a, m)
-        kmh, bar = v[k] * 3.6, tankP[k-1] / 1e5
+        Pw = Pwheel[k]
+        kmh, bar = v[k] * 3.6, Pa / 1e5
 
         if Pw >= 0:  # ══════════════════ TRACTION ══════════════════
-            use_pneu = (kmh < P.pneu_speed_thr and bar > P.pneu_pressure_min and
-                        Pw > P.pneu_power_thr and tankM[k-1] > 1e-3 and soc[k-1] > 0.2)
+            use_pneu = (kmh < speed_thr and bar > pressure_min and
+                        Pw > power_thr and m_air > 1e-3 and batt > batt_pneu_min)
 
             if use_pneu:
-                Pp[k] = P.pneu_power_split * Pw
-                Pe[k] = Pw - Pp[k]
+                Pp = split_pneu * Pw
+                Pe = Pw - Pp
                 pneu_use += 1
             else:
-                Pe[k] = Pw
+                Pp = 0.0
+                Pe = Pw
 
             # Electric
-            if Pe[k] > 0:
-                batt -= Pe[k] / electric_eff(kmh, Pe[k] / P.motor_Pmax) * dt
+            if Pe > 0:
+                batt -= Pe / _electric_eff(kmh, Pe / motor_Pmax, p) * dt
 
             # Pneumatic (FIXED: single efficiency application)
-            if Pp[k] > 0:
-                ηp = pneumatic_eff(kmh, bar)
-                E_from_tank = Pp[k] / ηp  # Energy drawn from tank [W]
-                tankM[k], tankT[k], tankP[k] = tank_state_update(
-                    tankM[k-1], tankT[k-1], E_from_tank, dt, False
-                )
+            if Pp > 0:
+                ηp = _pneumatic_eff(kmh, bar, p)
+                E_from_tank = Pp / ηp  # Energy drawn from tank [W]
+                m_air, T, Pa = _tank_state_update(m_air, T, E_from_tank, dt, False, p)
             else:
-                tankM[k], tankT[k], tankP[k] = tank_state_update(
-                    tankM[k-1], tankT[k-1], 0.0, dt, False
-                )
+                m_air, T, Pa = _tank_state_update(m_air, T, 0.0, dt, False, p)
 
         else:  # ══════════════════════ BRAKING ══════════════════════
             Preg = -Pw
             Pb, Pt = Preg, 0.0
             
-            if soc[k-1] >= 0.3 and bar <= P.regen_tank_Pmax:
-                Pb = P.regen_split_batt * Preg
-                Pt = P.regen_split_tank * Preg
+            if batt >= batt_regen_min and bar <= regen_tank_Pmax:
+                Pb = split_batt * Preg
+                Pt = split_tank * Preg
 
             # Battery regen
-            ηr = electric_eff(kmh, 0.2) * P.inverter_eta
-            Pb_cap = (P.batt_kWh * 3.6e6 * P.regen_limit - batt) / dt
+            ηr = _electric_eff(kmh, 0.2, p) * inverter_eta
+            Pb_cap = (batt_cap - batt) / dt
             Pb = min(Pb * ηr, Pb_cap)
             batt += Pb * dt
 
             # Tank regen (FIXED: consistent energy)
             if Pt > 0:
-                E_to_tank = Pt * P.comp_eta  # Energy entering tank [W]
-                tankM[k], tankT[k], tankP[k] = tank_state_update(
-                    tankM[k-1], tankT[k-1], E_to_tank, dt, True
-                )
+                E_to_tank = Pt * comp_eta  # Energy entering tank [W]
+                m_air, T, Pa = _tank_state_update(m_air, T, E_to_tank, dt, True, p)
             else:
-                tankM[k], tankT[k], tankP[k] = tank_state_update(
-                    tankM[k-1], tankT[k-1], 0.0, dt, False
-                )
+                m_air, T, Pa = _tank_state_update(m_air, T, 0.0, dt, False, p)
+
+            Pe, Pp = -Pb, -Pt
+
+        j = k * stride
+        batt_tr[j], Pe_tr[j], Pp_tr[j] = batt, Pe, Pp
+        tankP[j], tankT[j], tankM[j] = Pa, T, m_air
 
-            Pe[k], Pp[k] = -Pb, -Pt
+    return out, batt, pneu_use
 
-        soc[k] = np.clip(batt / (P.batt_kWh * 3.6e6), 0, 1)
+def simulate_hepv(t: NDArray, v: NDArray, trace: bool = True) -> HepvResult:
+    """
+    FIXED: No double efficiency penalty, mass-based tank.
 
-    return dict(
-        soc=soc, Pe=Pe, Pp=Pp,
-        tankP_bar=tankP / 1e5, tankT_C=tankT - 273.15, tankM_kg=tankM,
-        E_kWh=(P.batt_kWh * 3.6e6 - batt) / 3.6e6, pneu_use=pneu_use
+    With trace=False only E_kWh and pneu_use are returned (no per-step traces).
+    """
+    v = np.ascontiguousarray(v, dtype=np.float64)  # kernel signature: float64
+    dt, pk = t[1] - t[0], kernel_params()  # record of the current P
+    Pwheel = _wheel_power(v, acceleration(v, dt), P.m0 + P.m_pneu, pk)
+    out, batt_end, pneu_use = _simulate_hepv_kernel(v, Pwheel, dt, pk, trace)
+    E_kWh = (P.batt_kWh * 3.6e6 - batt_end) / 3.6e6
+    if not trace:
+        return HepvResult(E_kWh, pneu_use)
+    batt, Pe, Pp, tankP, tankT, tankM = out  # float32 row views, no copy
+    batt_full = np.float32(P.batt_kWh * 3.6e6)
+    return HepvResult(
+        E_kWh, pneu_use, soc=np.clip(batt / batt_full, 0, 1), Pe=Pe, Pp=Pp,
+        tankP_bar=tankP / np.float32(1e5), tankT_C=tankT - np.float32(273.15), tankM_kg=tankM
     )
 
+# No explicit signature: compiled (or loaded from the disk cache) on the first
+# sweep_hepv call, so a plain CLI run never starts the parallel threading layer.
+@njit(cache=True, parallel=True)
+def _sweep_hepv_kernel(v: NDArray, acc: NDArray, dt: float, grid: NDArray) -> Tuple:
+    N = len(grid)
+    E_kWh = np.empty(N);  pneu_use = np.empty(N, np.int64)
+    for i in prange(N):
+        p = grid[i]
+        Pwheel = _wheel_power(v, acc, p.m0 + p.m_pneu, p)
+        _, batt_end, pneu_use[i] = _simulate_hepv_kernel(v, Pwheel, dt, p, False)
+        E_kWh[i] = (p.batt_kWh * 3.6e6 - batt_end) / 3.6e6
+    return E_kWh, pneu_use
+
+def sweep_hepv(t: NDArray, v: NDArray, params: Sequence[Params]) -> Tuple[NDArray, NDArray]:
+    """
+    Run simulate_hepv for every parameter set (in parallel under Numba).
+
+    Example:
+        grid = [dataclasses.replace(P, P_init=p * 1e5) for p in (120, 150, 200)]
+        E_kWh, pneu_use = sweep_hepv(t, v, grid)
+
+    Returns:
+        (E_kWh, pneu_use) arrays, one entry per parameter set
+    """
+    if len(params) == 0:
+        return np.empty(0), np.empty(0, np.int64)
+    v = np.ascontiguousarray(v, dtype=np.float64)
+    dt = t[1] - t[0]
+    return _sweep_hepv_kernel(v, acceleration(v, dt), dt, kernel_params_array(params))
+
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 6.  PLOT MANAGER
 # ╚═══════════════════════════════════════════════════════════════════════════╝
 class PlotManager:
-    def __init__(self, t, v, bev, hepv, out_dir):
+    MAX_POINTS = 2000  # per time-series line; denser traces are decimated
+
+    def __init__(self, t, v, bev, hepv, out_dir, diff_pct, fast=False):
         self.t, self.v, self.bev, self.hepv, self.out = t, v, bev, hepv, out_dir
-        plt.rcParams.update({
+        self.diff_pct = diff_pct  # HEPV vs BEV energy [%], as computed in main()
+        self.fast = fast          # quick-look output: 100 dpi JPEG, thin lines
+        rc = {
             "font.size": 9, "axes.labelsize": 10, "axes.titlesize": 11,
             "legend.fontsize": 8, "lines.linewidth": 2, "axes.grid": True, "grid.alpha": 0.3
-        })
+        }
+        if fast:
+            rc.update({"lines.linewidth": 1, "agg.path.chunksize": 10_000})
+        plt.rcParams.update(rc)
+
+    @cached_property
+    def _series(self) -> Dict[str, Tuple[NDArray, NDArray]]:
+        """
+        (t, y) per trace in plot units. Traces longer than MAX_POINTS are
+        decimated: each bucket of `step` samples keeps its min and max, in
+        time order at their own timestamps, so single-step spikes survive
+        and ramps stay monotone. Unit scaling is applied once, after
+        decimation.
+        """
+        bev, hepv = self.bev, self.hepv
+        series = {  # key: (trace, plot-unit scale)
+            "kmh": (self.v, 3.6), "bev_soc": (bev.soc, 100), "hepv_soc": (hepv.soc, 100),
+            "tankP_bar": (hepv.tankP_bar, 1), "Pe_kW": (hepv.Pe, 1e-3),
+            "Pp_kW": (hepv.Pp, 1e-3), "tankT_C": (hepv.tankT_C, 1),
+            "tankM_g": (hepv.tankM_kg, 1e3),
+        }
+        N = len(self.t)
+        if N <= self.MAX_POINTS:
+            return {key: (self.t, y * k) for key, (y, k) in series.items()}
+        step = -(-2 * N // self.MAX_POINTS)  # ceil: 2 points per bucket
+        n = N // step * step
+        start = np.arange(0, n, step)[:, None]
+        out = {}
+        for key, (y, k) in series.items():
+            b = y[:n].reshape(-1, step)
+            i = np.sort(np.column_stack((b.argmin(1), b.argmax(1))), axis=1) + start
+            i = np.append(i.ravel(), np.arange(n, N))
+            out[key] = (self.t[i], y[i] * k)
+        return out
+
+    @cached_property
+    def _efficiency_curves(self) -> Dict[str, NDArray]:
+        """Efficiency-map curves [%], computed once per PlotManager."""
+        speeds, bars = np.linspace(10, 80, 120), np.linspace(10, 200, 120)
+        return dict(speeds=speeds, elec=electric_eff(speeds, 0.7) * 100,
+                    bars=bars, pneu=pneumatic_eff(30, bars) * 100)
 
     def fig_cycle(self):
-        fig, ax = plt.subplots(figsize=(10, 3))
-        ax.plot(self.t, self.v * 3.6, "k-")
+        d = self._series
+        fig, ax = plt.subplots(figsize=(10, 3), layout="constrained")
+        ax.plot(*d["kmh"], "k-")
         ax.set(xlabel="Time [s]", ylabel="Speed [km/h]", title="WLTP Urban Cycle")
         return fig
 
     def fig_soc(self):
-        fig, ax = plt.subplots()
-        ax.plot(self.t, self.bev["soc"] * 100, "b-", label="BEV")
-        ax.plot(self.t, self.hepv["soc"] * 100, "r--", label="HEPV")
+        d = self._series
+        fig, ax = plt.subplots(layout="constrained")
+        ax.plot(*d["bev_soc"], "b-", label="BEV")
+        ax.plot(*d["hepv_soc"], "r--", label="HEPV")
         ax.set(xlabel="Time [s]", ylabel="SoC [%]", title="Battery SoC")
         ax.set_ylim(80, 105);  ax.legend()
         return fig
 
     def fig_energy_bar(self):
-        fig, ax = plt.subplots(figsize=(4, 4))
-        e = [self.bev["E_kWh"], self.hepv["E_kWh"]]
+        fig, ax = plt.subplots(figsize=(4, 4), layout="constrained")
+        e = [self.bev.E_kWh, self.hepv.E_kWh]
         bars = ax.bar(["BEV", "HEPV"], e,
-                      color=["#4CAF50", "#F44336" if e[1] > e[0] else "#FF9800"])
-        for bar, val in zip(bars, e):
-            ax.text(bar.get_x() + bar.get_width() / 2, val,
-                    f"{val:.4f} kWh", ha="center", va="bottom")
+                      color=["#4CAF50", "#F44336" if self.diff_pct > 0 else "#FF9800"])
+        ax.bar_label(bars, fmt="%.4f kWh")
         ax.set_ylabel("Total Energy [kWh]")
         return fig
 
     def combined_panel(self):
-        fig = plt.figure(figsize=(12, 9))
-        gs = fig.add_gridspec(3, 3)
+        d = self._series
+        fig, axes = plt.subplots(3, 3, figsize=(12, 9), layout="constrained")
+        (ax1, ax2, ax3), (ax4, ax5, ax6), (ax7, ax8, ax9) = axes
+        for ax in (ax2, ax3, ax5, ax7, ax8):  # time-series panels share one x axis
+            ax.sharex(ax1)
+        ax9.remove()
         
-        ax1 = fig.add_subplot(gs[0, 0])
-        ax1.plot(self.t, self.v * 3.6)
+        ax1.plot(*d["kmh"])
         ax1.set_title("Driving Cycle");  ax1.set_ylabel("km/h")
         
-        ax2 = fig.add_subplot(gs[0, 1])
-        ax2.plot(self.t, self.bev["soc"] * 100, label="BEV")
-        ax2.plot(self.t, self.hepv["soc"] * 100, label="HEPV")
+        ax2.plot(*d["bev_soc"], label="BEV")
+        ax2.plot(*d["hepv_soc"], label="HEPV")
         ax2.set_title("Battery SoC");  ax2.legend()
         
-        ax3 = fig.add_subplot(gs[0, 2])
-        ax3.plot(self.t, self.hepv["tankP_bar"])
+        ax3.plot(*d["tankP_bar"])
         ax3.set_title("Tank Pressure [bar]")
         
-        ax4 = fig.add_subplot(gs[1, 0])
-        speeds = np.linspace(10, 80, 120)
-        ax4.plot(speeds, [electric_eff(s, 0.7) * 100 for s in speeds], label="Elec")
+        c = self._efficiency_curves
+        ax4.plot(c["speeds"], c["elec"], label="Elec")
         # FIXED efficiency map
-        bars_test = np.linspace(10, 200, 120)
-        ax4.plot(bars_test, [pneumatic_eff(30, b) * 100 for b in bars_test], label="Pneu")
+        ax4.plot(c["bars"], c["pneu"], label="Pneu")
         ax4.set_title("Efficiency Maps");  ax4.set_ylabel("%");  ax4.legend()
         
-        ax5 = fig.add_subplot(gs[1, 1])
-        ax5.plot(self.t, self.hepv["Pe"] / 1e3, label="Electric")
-        ax5.plot(self.t, self.hepv["Pp"] / 1e3, label="Pneumatic")
+        ax5.plot(*d["Pe_kW"], label="Electric")
+        ax5.plot(*d["Pp_kW"], label="Pneumatic")
         ax5.set_title("Power Split [kW]");  ax5.legend()
         
-        ax6 = fig.add_subplot(gs[1, 2])
-        energy = [self.bev["E_kWh"], self.hepv["E_kWh"]]
-        colors = ["#4CAF50", "#F44336" if energy[1] > energy[0] else "#FF9800"]
+        energy = [self.bev.E_kWh, self.hepv.E_kWh]
+        colors = ["#4CAF50", "#F44336" if self.diff_pct > 0 else "#FF9800"]
         bars = ax6.bar(["BEV", "HEPV"], energy, color=colors)
-        for b, val in zip(bars, energy):
-            ax6.text(b.get_x() + b.get_width() / 2, val, f"{val:.4f}",
-                     ha="center", va="bottom", fontsize=8)
+        ax6.bar_label(bars, fmt="%.4f", fontsize=8)
         ax6.set_title("Total Energy [kWh]")
         
-        ax7 = fig.add_subplot(gs[2, 0])
-        ax7.plot(self.t, self.hepv["tankT_C"])
+        ax7.plot(*d["tankT_C"])
         ax7.set_title("Tank Temp [°C]")
         
-        ax8 = fig.add_subplot(gs[2, 1])
-        ax8.plot(self.t, self.hepv["tankM_kg"] * 1000)
+        ax8.plot(*d["tankM_g"])
         ax8.set_title("Tank Mass [g]")
         
-        fig.tight_layout()
         return fig
 
-    def save(self, save_individual, save_combined, show, dpi):
-        self.out.mkdir(parents=True, exist_ok=True)
-        saved = []
-
-        if save_combined:
-            fig = self.combined_panel()
-            path = self.out / "combined.png"
-            fig.savefig(path, dpi=dpi, bbox_inches="tight")
-            saved.append(path);  plt.close(fig)
+    def _render(self, name, builder, dpi, keep=False):
+        """
+        Build one figure and write it. With keep=True the figure stays open
+        (at screen dpi) for plt.show().
+        """
+        ext, pil_kwargs = ("jpg", {"quality": 85}) if self.fast else ("png", {"compress_level": 1})
+        path = self.out / f"{name}.{ext}"
+        fig = builder()
+        if not hasattr(fig.canvas, "buffer_rgba"):
+            # Non-raster interactive backend (e.g. MPLBACKEND=svg with --show):
+            # savefig renders through a temporary Agg canvas.
+            fig.savefig(path, dpi=dpi, pil_kwargs=pil_kwargs)
+            if not keep:
+                plt.close(fig)
+            return path
+        # One Agg draw at the output resolution (constrained layout is
+        # solved here), then the RGBA buffer goes straight to PIL.
+        screen_dpi = fig.dpi
+        fig.set_dpi(dpi)
+        fig.canvas.draw()
+        img = Image.fromarray(np.asarray(fig.canvas.buffer_rgba()))
+        if keep:
+            fig.set_dpi(screen_dpi)
+        else:
+            plt.close(fig)
+        img.convert("RGB").save(path, dpi=(dpi, dpi), **pil_kwargs)  # keep physical size
+        return path
 
+    def save(self, save_individual, save_combined, show, dpi, combined_dpi=150):
+        self.out.mkdir(parents=True, exist_ok=True)
+        if self.fast:
+            dpi = combined_dpi = 100
+        jobs = []
+        if save_combined:  # dashboard: lower resolution than the single figures
+            jobs.append(("combined", self.combined_panel, combined_dpi))
         if save_individual:
-            for fname, func in {
-                "cycle.png": self.fig_cycle, "soc.png": self.fig_soc,
-                "energy.png": self.fig_energy_bar
-            }.items():
-                fig = func();  p = self.out / fname
-                fig.savefig(p, dpi=dpi, bbox_inches="tight")
-                saved.append(p);  plt.close(fig)
+            jobs += [("cycle", self.fig_cycle, dpi), ("soc", self.fig_soc, dpi),
+                     ("energy", self.fig_energy_bar, dpi)]
+
+        saved = [self._render(*job, keep=show) for job in jobs]
 
         logging.info("Saved %d figure(s): %s", len(saved), ", ".join(p.name for p in saved))
 
         if show:
-            for path in saved:
-                plt.figure();  img = plt.imread(path)
-                plt.imshow(img);  plt.axis("off")
             plt.show()
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
 # 7.  EXPORT & SUMMARY
 # ╚═══════════════════════════════════════════════════════════════════════════╝
-def save_csv(path, arr, header):
-    np.savetxt(path, arr, delimiter=";", header=header, comments="", fmt="%.6f")
-
-def save_summary(out, args, bev, hepv):
-    diff = (hepv["E_kWh"] / bev["E_kWh"] - 1) * 100
+def save_csv(path, cols, header, chunk=100_000):
+    """
+    Same output as np.savetxt(column_stack(cols), fmt="%.6f"). Rows are
+    stacked and formatted `chunk` at a time (one %-format per chunk), so peak
+    memory does not grow with the run length.
+    """
+    row = ";".join(["%.6f"] * len(cols))
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(header + "\n")
+        for i in range(0, len(cols[0]), chunk):
+            block = np.column_stack([c[i:i + chunk] for c in cols])
+            f.write("\n".join([row] * len(block)) % tuple(block.ravel().tolist()) + "\n")
+
+def save_summary(out, args, bev, hepv, diff):
     txt = out / "summary.txt"
-    with txt.open("w", encoding="utf-8") as f:
-        f.write(f"HEPV v{__version__} Summary - {datetime.now()}\n")
-        f.write(f"Duration: {args.duration}s  dt={args.dt}s\n")
-        f.write(f"BEV  energy: {bev['E_kWh']:.4f} kWh\n")
-        f.write(f"HEPV energy: {hepv['E_kWh']:.4f} kWh\n")
-        f.write(f"Difference: {diff:+.2f}%\n")
-        f.write(f"Pneumatic usage: {hepv['pneu_use']} time steps\n")
+    txt.write_text(
+        f"HEPV v{__version__} Summary - {datetime.now()}\n"
+        f"Duration: {args.duration}s  dt={args.dt}s\n"
+        f"BEV  energy: {bev.E_kWh:.4f} kWh\n"
+        f"HEPV energy: {hepv.E_kWh:.4f} kWh\n"
+        f"Difference: {diff:+.2f}%\n"
+        f"Pneumatic usage: {hepv.pneu_use} time steps\n",
+        encoding="utf-8",
+    )
     logging.info("Summary → %s", txt.name)
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
@@ -548,21 +810,22 @@ def main():
     bev = simulate_bev(t, v)
     hepv = simulate_hepv(t, v)
     
-    diff = (hepv["E_kWh"] / bev["E_kWh"] - 1) * 100
+    diff = (hepv.E_kWh / bev.E_kWh - 1) * 100
     logging.info("Δ energy HEPV vs BEV: %+.2f%%", diff)
 
-    save_csv(args.out / "bev.csv",
-             np.column_stack((t, v * 3.6, bev["soc"] * 100)),
-             "time_s;speed_kmh;soc_%")
-    save_csv(args.out / "hepv.csv",
-             np.column_stack((t, v * 3.6, hepv["soc"] * 100, hepv["tankP_bar"])),
+    kmh = v * 3.6
+    save_csv(args.out / "bev.csv", (t, kmh, bev.soc * 100), "time_s;speed_kmh;soc_%")
+    save_csv(args.out / "hepv.csv", (t, kmh, hepv.soc * 100, hepv.tankP_bar),
              "time_s;speed_kmh;soc_%;P_bar")
 
-    save_summary(args.out, args, bev, hepv)
+    save_summary(args.out, args, bev, hepv, diff)
 
     if not args.skip_plots:
-        PlotManager(t, v, bev, hepv, args.out).save(
-            args.save_individual, not args.skip_combined, args.show, args.dpi
+        if not args.show:  # files only: no GUI toolkit start-up
+            plt.switch_backend("Agg")
+        PlotManager(t, v, bev, hepv, args.out, diff, args.fast_plots).save(
+            args.save_individual, not args.skip_combined, args.show, args.dpi,
+            args.combined_dpi
         )
 
     print("=" * 72)